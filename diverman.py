@@ -1,58 +1,370 @@
 import argparse
+import atexit
+import asyncio
+import collections
+import functools
+import logging
+import logging.handlers
+import mmap
+import queue
 import re
+import socket
+import string
+import sys
 import requests
 import concurrent.futures
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-def extract_words_from_text(text):
-    words = re.findall(r'\b\w+\b', text)  # Adjusted regex to match whole words
-    return words
-
-def extract_words_hyphen_from_text(text):
-    hyphen_words = re.findall(r'\b\w+(?:-\w+)+\b', text)
-    return hyphen_words
-
-def extract_filenames_from_text(text):
-    filenames = re.findall(r'\b\w+\.(?:3g2|3gp|7z|ai|aif|apk|arj|asp|aspx|avi|bak|bat|bin|bmp|cab|cda|cer|cfg|cfm|cgi|class|cpl|cpp|css|csv|cur|dat|db|dbf|deb|dll|dmg|dmp|doc|docx|drv|email|eml|emlx|exe|flv|fnt|fon|gadget|gif|git|h264|hta|htm|html|icns|ico|inc|ini|iso|jar|java|jhtml|jpeg|jpg|js|jsa|jsp|key|lnk|log|m4v|mdb|mid|mkv|mov|mp3|mp4|mpa|mpeg|mpg|msg|msi|nsf|odp|ods|odt|oft|ogg|ost|otf|part|pcap|pdb|pdf|phar|php|php2|php3|php4|php5|php6|php7|phps|pht|phtml|pkg|pl|png|pps|ppt|pptx|ps|psd|pst|py|rar|reg|rm|rpm|rss|rtf|sav|sh|shtml|sql|svg|swf|swift|sys|tar|targz|tex|tif|tiff|tmp|toast|ttf|txt|vb|vcd|vcf|vob|wav|wma|wmv|wpd|wpl|wsf|xhtml|xls|xlsm|xlsx|xml|z|zip|json)\b', text)
-    return filenames
-
-def extract_words_from_url(url, headers=None):
-    response = requests.get(url, headers=headers, allow_redirects=False)  # Passing headers to requests.get()
-    if response.status_code == 200:
-        text = response.text
-        words = extract_words_from_text(text)
-        hyphen_words = extract_words_hyphen_from_text(text)
-        filenames = extract_filenames_from_text(text)
-        return words, hyphen_words, filenames
+try:
+    import re2
+except ImportError:
+    re2 = None
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+COMMON_EXTENSIONS = (
+    '3g2', '3gp', '7z', 'ai', 'aif', 'apk', 'arj', 'asp', 'aspx', 'avi', 'bak',
+    'bat', 'bin', 'bmp', 'cab', 'cda', 'cer', 'cfg', 'cfm', 'cgi', 'class',
+    'cpl', 'cpp', 'css', 'csv', 'cur', 'dat', 'db', 'dbf', 'deb', 'dll', 'dmg',
+    'dmp', 'doc', 'docx', 'drv', 'email', 'eml', 'emlx', 'exe', 'flv', 'fnt',
+    'fon', 'gadget', 'gif', 'git', 'h264', 'hta', 'htm', 'html', 'icns', 'ico',
+    'inc', 'ini', 'iso', 'jar', 'java', 'jhtml', 'jpeg', 'jpg', 'js', 'jsa',
+    'jsp', 'key', 'lnk', 'log', 'm4v', 'mdb', 'mid', 'mkv', 'mov', 'mp3',
+    'mp4', 'mpa', 'mpeg', 'mpg', 'msg', 'msi', 'nsf', 'odp', 'ods', 'odt',
+    'oft', 'ogg', 'ost', 'otf', 'part', 'pcap', 'pdb', 'pdf', 'phar', 'php',
+    'php2', 'php3', 'php4', 'php5', 'php6', 'php7', 'phps', 'pht', 'phtml',
+    'pkg', 'pl', 'png', 'pps', 'ppt', 'pptx', 'ps', 'psd', 'pst', 'py', 'rar',
+    'reg', 'rm', 'rpm', 'rss', 'rtf', 'sav', 'sh', 'shtml', 'sql', 'svg',
+    'swf', 'swift', 'sys', 'tar', 'targz', 'tex', 'tif', 'tiff', 'tmp',
+    'toast', 'ttf', 'txt', 'vb', 'vcd', 'vcf', 'vob', 'wav', 'wma', 'wmv',
+    'wpd', 'wpl', 'wsf', 'xhtml', 'xls', 'xlsm', 'xlsx', 'xml', 'z', 'zip',
+    'json',
+)
+
+log = logging.getLogger('diverman')
+
+def compile_pattern(pattern):
+    # RE2 guarantees linear-time matching, but its wrapper pays far more per
+    # match than re, so it is only used for patterns that match rarely.
+    if re2 is not None:
+        return re2.compile(pattern)
+    return re.compile(pattern)
+
+_EXT_ALT = '|'.join(sorted(map(re.escape, COMMON_EXTENSIONS), key=len, reverse=True))
+
+def build_extension_automaton():
+    automaton = ahocorasick.Automaton()
+    for extension in COMMON_EXTENSIONS:
+        automaton.add_word('.' + extension, extension)
+    automaton.make_automaton()
+    return automaton
+
+# With pyahocorasick installed, filenames are found by a trie scan for the
+# dotted extensions instead of the large extension alternation.
+EXTENSION_AUTOMATON = build_extension_automaton() if ahocorasick is not None else None
+
+# Response bodies and files are scanned as raw bytes: nothing is decoded
+# first and \w is a plain ASCII class rather than a Unicode lookup.
+# Underscores separate words, so snake_case names yield their parts directly.
+# Nearly every byte belongs to a word, so this stays on re (see compile_pattern).
+WORD_PATTERN = re.compile(rb'[A-Za-z0-9]+')
+HYPHEN_PATTERN = compile_pattern(rb'\b\w+(?:-\w+)+\b')
+# The extensions are matched case-sensitively against lowercased data,
+# which is cheaper than a case-insensitive match.
+FILENAME_PATTERN = compile_pattern(rb'\b\w+\.(?:' + _EXT_ALT.encode('ascii') + rb')\b')
+
+CHUNK_SIZE = 65536
+# Bytes that can occur inside a token; data can be cut after any other byte.
+TOKEN_RUN = re.compile(rb'[A-Za-z0-9_.\-]*')
+# Longer runs (base64 blobs and the like) are cut regardless, so the carried
+# tail, and with it memory, stays bounded by the chunk size.
+MAX_TOKEN_LENGTH = 1024
+# Pieces of one response that may wait in the CPU pool at a time.
+MAX_PENDING_PIECES = 8
+# Hosts whose connection pools are kept alive at once, and cached lookups.
+MAX_POOLED_HOSTS = 64
+DNS_CACHE_SIZE = 4096
+
+# Only these responses are scanned; anything else is binary noise to the regexes.
+TEXTUAL_MIMES = frozenset({'application/json', 'application/xml', 'application/javascript', 'application/xhtml+xml'})
+MAX_CONTENT_LENGTH = 50 * 1024 * 1024
+ACCEPT_TEXT = 'text/html,application/xhtml+xml,text/plain;q=0.9,application/json;q=0.8'
+
+_ASCII_WORD_CHARS = frozenset(string.ascii_letters + string.digits + '_')
+
+def is_word_char(char):
+    return char in _ASCII_WORD_CHARS
+
+def find_filename_spans(lowered):
+    # Same matches as FILENAME_PATTERN: a maximal run of word characters, a dot and
+    # an extension that is not followed by another word character.
+    last_end = 0
+    for end, extension in EXTENSION_AUTOMATON.iter(lowered):
+        end += 1
+        if end < len(lowered) and is_word_char(lowered[end]):
+            continue
+        dot = end - len(extension) - 1
+        start = dot
+        while start > 0 and is_word_char(lowered[start - 1]):
+            start -= 1
+        if start == dot or start < last_end:
+            continue
+        last_end = end
+        yield start, end
+
+def scan_bytes(data, words, hyphen_words, filenames):
+    # Each token kind gets its own pass: a hyphenated word and a filename
+    # can overlap (asset-1a2b.css), and one combined scan would keep only
+    # the first of the two.
+    words.update(WORD_PATTERN.findall(data))
+    hyphen_words.update(HYPHEN_PATTERN.findall(data))
+    lowered = data.lower()
+    if EXTENSION_AUTOMATON is not None:
+        # Latin-1 maps each byte to one character, so the spans line up.
+        spans = find_filename_spans(lowered.decode('latin-1'))
     else:
-        print(f"Failed to retrieve data from URL: {url}")
-        return [], [], []
+        spans = (match.span() for match in FILENAME_PATTERN.finditer(lowered))
+    filenames.update(data[start:end] for start, end in spans)
+
+def extract_all_from_bytes(data):
+    words, hyphen_words, filenames = set(), set(), set()
+    # Deduplicating window by window keeps only one window's worth of
+    # duplicate match strings alive, instead of one per token in the data.
+    chunks = (data[start:start + CHUNK_SIZE] for start in range(0, len(data), CHUNK_SIZE))
+    for piece in split_at_separators(chunks):
+        scan_bytes(piece, words, hyphen_words, filenames)
+    return words, hyphen_words, filenames
+
+def extract_all_from_file(path):
+    with open(path, 'rb') as file:
+        try:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            # Empty files and pipes cannot be mapped.
+            return extract_all_from_bytes(file.read())
+        with mapped:
+            # Pages are read on demand and can be dropped once scanned, so
+            # memory use stays flat regardless of the file size.
+            if hasattr(mapped, 'madvise'):
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+            return extract_all_from_bytes(mapped)
+
+def split_at_separators(chunks):
+    # Re-cut a byte stream after its last non-token byte so that no token is
+    # split across two pieces; the unfinished tail is carried forward.
+    carry = b''
+    for chunk in chunks:
+        buffer = carry + chunk
+        # Measure the trailing run of token bytes by matching the reversed
+        # tail, which looks at no more than MAX_TOKEN_LENGTH bytes.
+        run = TOKEN_RUN.match(buffer[:-MAX_TOKEN_LENGTH - 1:-1]).end()
+        cut = len(buffer) - run if run < MAX_TOKEN_LENGTH else len(buffer)
+        if cut:
+            yield buffer[:cut]
+        carry = buffer[cut:]
+    if carry:
+        yield carry
+
+def start_logging():
+    # Workers only enqueue records; one listener thread formats them and
+    # writes to stderr, so diagnostics never contend for stdout.
+    records = queue.SimpleQueue()
+    log.addHandler(logging.handlers.QueueHandler(records))
+    log.setLevel(logging.WARNING)
+    log.propagate = False
+    listener = logging.handlers.QueueListener(records, logging.StreamHandler())
+    listener.start()
+    return listener
 
-def process_urls_from_file(file_path, num_threads, headers=None):
+def enable_dns_cache():
+    # Repeated hosts in a URL list are resolved once; failed lookups raise
+    # and are therefore not cached.
+    socket.getaddrinfo = functools.lru_cache(maxsize=DNS_CACHE_SIZE)(socket.getaddrinfo)
+
+def create_session(num_threads, headers=None):
+    # Size the pool to the worker count so keep-alive connections are reused
+    # instead of being discarded when more threads than sockets are busy.
+    retries = Retry(total=2, backoff_factor=0.3, status_forcelist=[502, 503, 504], raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=max(num_threads, MAX_POOLED_HOSTS), pool_maxsize=num_threads * 2, max_retries=retries)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers['Accept'] = ACCEPT_TEXT
+    # Installed once so requests does not merge per-call headers on every URL.
+    if headers:
+        session.headers.update(headers)
+    return session
+
+def is_textual_response(headers):
+    content_type = headers.get('Content-Type', '').split(';')[0].strip().lower()
+    if content_type and not (content_type.startswith('text/') or content_type in TEXTUAL_MIMES
+                             or content_type.endswith(('+xml', '+json'))):
+        return False
+    content_length = headers.get('Content-Length', '')
+    return not (content_length.isdigit() and int(content_length) > MAX_CONTENT_LENGTH)
+
+class ResponseTooLarge(Exception):
+    pass
+
+def limit_body_size(chunks):
+    # Content-Length is absent on chunked responses and counts compressed
+    # bytes otherwise, so the limit is enforced on the body as it arrives.
+    received = 0
+    for chunk in chunks:
+        received += len(chunk)
+        if received > MAX_CONTENT_LENGTH:
+            raise ResponseTooLarge
+        yield chunk
+
+def merge_results(results, words, hyphen_words, filenames):
+    piece_words, piece_hyphen_words, piece_filenames = results
+    words.update(piece_words)
+    hyphen_words.update(piece_hyphen_words)
+    filenames.update(piece_filenames)
+
+def extract_words_from_url(url, session=None, cpu_pool=None):
+    try:
+        return scan_url(url, session, cpu_pool)
+    except ResponseTooLarge:
+        log.warning("Skipping non-text or oversized response from URL: %s", url)
+        return set(), set(), set()
+    except requests.RequestException as error:
+        log.warning("Error retrieving %s: %s", url, error)
+        return set(), set(), set()
+
+def scan_url(url, session=None, cpu_pool=None):
+    client = session if session is not None else requests
+    response = client.get(url, allow_redirects=False, stream=True)
+    with response:
+        if response.status_code == 200:
+            if not is_textual_response(response.headers):
+                log.warning("Skipping non-text or oversized response from URL: %s", url)
+                return set(), set(), set()
+            words, hyphen_words, filenames = set(), set(), set()
+            chunks = limit_body_size(response.iter_content(chunk_size=CHUNK_SIZE))
+            if cpu_pool is None:
+                for piece in split_at_separators(chunks):
+                    scan_bytes(piece, words, hyphen_words, filenames)
+                return words, hyphen_words, filenames
+            # Scan in worker processes so the regex work is not serialized
+            # by the GIL while this thread keeps reading the body.
+            pending = collections.deque()
+            for piece in split_at_separators(chunks):
+                pending.append(cpu_pool.submit(extract_all_from_bytes, piece))
+                if len(pending) > MAX_PENDING_PIECES:
+                    merge_results(pending.popleft().result(), words, hyphen_words, filenames)
+            for future in pending:
+                merge_results(future.result(), words, hyphen_words, filenames)
+            return words, hyphen_words, filenames
+        else:
+            log.warning("Failed to retrieve data from URL: %s", url)
+            return set(), set(), set()
+
+async def fetch_and_extract(client, url, semaphore, cpu_pool):
+    async with semaphore:
+        try:
+            async with client.get(url, allow_redirects=False) as response:
+                if response.status != 200:
+                    log.warning("Failed to retrieve data from URL: %s", url)
+                    return set(), set(), set()
+                if not is_textual_response(response.headers):
+                    log.warning("Skipping non-text or oversized response from URL: %s", url)
+                    return set(), set(), set()
+                chunks, received = [], 0
+                async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                    received += len(chunk)
+                    if received > MAX_CONTENT_LENGTH:
+                        log.warning("Skipping non-text or oversized response from URL: %s", url)
+                        return set(), set(), set()
+                    chunks.append(chunk)
+                data = b''.join(chunks)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+            log.warning("Error retrieving %s: %s", url, error)
+            return set(), set(), set()
+        # The regex scan is CPU-bound, so run it outside the event loop.
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(cpu_pool, extract_all_from_bytes, data)
+
+async def process_urls_async(urls, num_threads, headers=None, sort_output=False):
+    semaphore = asyncio.Semaphore(num_threads * 8)
+    connector = aiohttp.TCPConnector(limit=num_threads * 8, limit_per_host=num_threads, ttl_dns_cache=300)
+    with concurrent.futures.ProcessPoolExecutor() as cpu_pool:
+        async with aiohttp.ClientSession(connector=connector, headers=headers) as client:
+            tasks = [fetch_and_extract(client, url, semaphore, cpu_pool) for url in urls]
+            for task in asyncio.as_completed(tasks):
+                words, hyphen_words, filenames = await task
+                print_results(words, hyphen_words, filenames, sort_output)
+
+def unique_urls(lines):
+    # Repeats (ignoring fragments and a trailing slash) would fetch and scan
+    # the same body again, so only the first occurrence is kept.
+    seen = set()
+    for line in lines:
+        url = line.strip()
+        if not url:
+            continue
+        try:
+            scheme = urlsplit(url).scheme.lower()
+        except ValueError:
+            scheme = None
+        if scheme not in ('http', 'https'):
+            log.warning("Ignoring invalid URL: %s", url)
+            continue
+        key = url.split('#', 1)[0].rstrip('/')
+        if key not in seen:
+            seen.add(key)
+            yield url
+
+def process_urls_from_file(file_path, num_threads, session, use_async=False, sort_output=False):
     with open(file_path, 'r') as file:
-        urls = file.readlines()
-        with concurrent.futures.ThreadPoolExecutor(max_workers=num_threads) as executor:
-            futures = [executor.submit(extract_words_from_url, url.strip(), headers) for url in urls]
+        urls = list(unique_urls(file))
+        if use_async:
+            if aiohttp is not None:
+                asyncio.run(process_urls_async(urls, num_threads, dict(session.headers), sort_output))
+                return
+            log.warning("aiohttp is not installed, falling back to threads.")
+        with concurrent.futures.ProcessPoolExecutor() as cpu_pool, \
+                concurrent.futures.ThreadPoolExecutor(max_workers=num_threads) as executor:
+            futures = [executor.submit(extract_words_from_url, url, session, cpu_pool) for url in urls]
             for future in concurrent.futures.as_completed(futures):
                 words, hyphen_words, filenames = future.result()
-                print_words(words)
-                print_hyphenated_words(hyphen_words)
-                print_filenames(filenames)
-
-def print_words(words):
-    for word in words:
-        print(word)
-        if "_" in word:
-            pieces = word.split("_")
-            for piece in pieces:
-                print(piece)
-
-def print_hyphenated_words(hyphen_words):
-    for word in hyphen_words:
-        print(word)
-
-def print_filenames(filenames):
-    for filename in filenames:
-        print(filename)
+                print_results(words, hyphen_words, filenames, sort_output)
+
+def write_lines(lines, sort_output=False):
+    # Tokens are ASCII bytes from the scanner, so a batch is joined and
+    # written in one call with nothing to encode.
+    lines = sorted(lines) if sort_output else list(lines)
+    if not lines:
+        return
+    payload = b"\n".join(lines) + b"\n"
+    sys.stdout.flush()
+    sys.stdout.buffer.write(payload)
+    sys.stdout.buffer.flush()
+
+def print_words(words, sort_output=False):
+    write_lines(words, sort_output)
+
+def print_hyphenated_words(hyphen_words, sort_output=False):
+    write_lines(hyphen_words, sort_output)
+
+def print_filenames(filenames, sort_output=False):
+    write_lines(filenames, sort_output)
+
+def print_results(words, hyphen_words, filenames, sort_output=False):
+    # Results are sets, so they are printed in arbitrary order unless sorted.
+    print_words(words, sort_output)
+    print_hyphenated_words(hyphen_words, sort_output)
+    print_filenames(filenames, sort_output)
 
 def main():
     parser = argparse.ArgumentParser(description="Extract and display words and filenames from a text file or URL.")
@@ -60,8 +372,18 @@ def main():
     parser.add_argument("-u", "--url", help="URL to retrieve text from.")
     parser.add_argument("-l", "--url_list", help="Path to a file containing a list of URLs.")
     parser.add_argument("-t", "--threads", type=int, default=1, help="Number of threads to use for sending HTTP requests.")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="Fetch the URL list with aiohttp instead of threads.")
+    parser.add_argument("--sorted", dest="sort_output", action="store_true", help="Print each group of results in sorted order.")
+    parser.add_argument("--dns-cache", action="store_true", help="Cache DNS lookups for the rest of the run.")
     parser.add_argument("-H", "--headers", help="Custom HTTP headers as a string in the format 'key1:value1,key2:value2'")
     args = parser.parse_args()
+    if args.threads < 1:
+        parser.error("--threads must be at least 1.")
+
+    atexit.register(start_logging().stop)
+
+    if args.dns_cache:
+        enable_dns_cache()
 
     headers = {}
     if args.headers:
@@ -72,26 +394,20 @@ def main():
                 key, value = parts
                 headers[key.strip()] = value.strip()
             else:
-                print(f"Ignoring invalid header: {header}")
+                log.warning("Ignoring invalid header: %s", header)
 
     if args.file:
-        with open(args.file, 'r') as file:
-            text = file.read()
-            words = extract_words_from_text(text)
-            hyphen_words = extract_words_hyphen_from_text(text)
-            filenames = extract_filenames_from_text(text)
-            print_words(words)
-            print_hyphenated_words(hyphen_words)
-            print_filenames(filenames)
+        words, hyphen_words, filenames = extract_all_from_file(args.file)
+        print_results(words, hyphen_words, filenames, args.sort_output)
     elif args.url:
-        words, hyphen_words, filenames = extract_words_from_url(args.url, headers=headers)
-        print_words(words)
-        print_hyphenated_words(hyphen_words)
-        print_filenames(filenames)
+        with create_session(1, headers) as session:
+            words, hyphen_words, filenames = extract_words_from_url(args.url, session)
+        print_results(words, hyphen_words, filenames, args.sort_output)
     elif args.url_list:
-        process_urls_from_file(args.url_list, args.threads, headers=headers)
+        with create_session(args.threads, headers) as session:
+            process_urls_from_file(args.url_list, args.threads, session, use_async=args.use_async, sort_output=args.sort_output)
     else:
-        print("Please provide either a file path, a URL, or a file containing a list of URLs.")
+        parser.error("Please provide either a file path, a URL, or a file containing a list of URLs.")
 
 if __name__ == "__main__":
     main()